@@ -1,9 +1,20 @@
 import cv2
 import numpy as np
 
-def detectAruco(frame, dictName="DICT_4X4_50", draw=True):
+detectors = {}
+
+def getDetector(dictName="DICT_4X4_50"):
+    '''
+    return cached ArUco detector for dictionary, built once on first use
+    '''
+    if dictName not in detectors:
+        dictionary = cv2.aruco.getPredefinedDictionary(getattr(cv2.aruco, dictName))
+        detectors[dictName] = cv2.aruco.ArucoDetector(dictionary, cv2.aruco.DetectorParameters())
+    return detectors[dictName]
+
+def detectAruco(frame, dictName="DICT_4X4_50", draw=True, roundCorners=True):
     '''
-    detect ArUco markers, returns (ids, centers, cornersMap, annotatedFrame)
+    detect ArUco markers, returns (ids, centers, cornersMap, annotatedFrame); roundCorners=False keeps sub-pixel corners
     '''
     # check if ArUco module available
     if not hasattr(cv2, "aruco"):
@@ -11,9 +22,8 @@ def detectAruco(frame, dictName="DICT_4X4_50", draw=True):
     # validate dictionary name
     if not hasattr(cv2.aruco, dictName):
         dictName = "DICT_4X4_50"
-    # setup ArUco detector
-    dictionary = cv2.aruco.getPredefinedDictionary(getattr(cv2.aruco, dictName))
-    detector = cv2.aruco.ArucoDetector(dictionary, cv2.aruco.DetectorParameters())
+    # get cached ArUco detector
+    detector = getDetector(dictName)
     # detect markers
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     corners, ids, _ = detector.detectMarkers(gray)
@@ -29,7 +39,7 @@ def detectAruco(frame, dictName="DICT_4X4_50", draw=True):
         for i, cid in enumerate(idList):
             # store corner points
             pts = corners[i][0]
-            cornersMap[cid] = pts.astype(int)
+            cornersMap[cid] = pts.astype(int) if roundCorners else pts.astype(float)
             # compute center
             cx, cy = int(pts[:, 0].mean()), int(pts[:, 1].mean())
             centers[cid] = (cx, cy)
@@ -14,22 +14,31 @@ class CameraStream:
         self.index = index
         self.backend = getBackend() if backend is None else backend
 
+        # pass settings as open parameters so the driver is configured in one call
+        params = []
+        if width is not None:
+            params += [cv2.CAP_PROP_FRAME_WIDTH, int(width)]
+        if height is not None:
+            params += [cv2.CAP_PROP_FRAME_HEIGHT, int(height)]
+        if fps is not None:
+            params += [cv2.CAP_PROP_FPS, int(round(fps))]
+
         # open camera stream
-        if self.backend is not None:
-            self.cap = cv2.VideoCapture(self.index, self.backend)
-        else:
-            self.cap = cv2.VideoCapture(self.index)
+        backendId = cv2.CAP_ANY if self.backend is None else self.backend
+        self.cap = cv2.VideoCapture(self.index, backendId, params)
+
+        # some backends reject open parameters, fall back to setting them one by one
+        if not self.cap.isOpened() and params:
+            self.cap = cv2.VideoCapture(self.index, backendId)
+            for i in range(0, len(params), 2):
+                self.cap.set(params[i], params[i + 1])
 
         # check that camera opened successfully
         if not self.cap.isOpened():
             raise RuntimeError(f"Could not open camera at index {self.index}.")
 
-        # apply camera settings if provided
-        if width is not None:
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, int(width))
-        if height is not None:
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, int(height))
-        if fps is not None:
+        # open parameters are integers, apply fractional rates such as 29.97 afterwards
+        if fps is not None and float(fps) != int(round(fps)):
             self.cap.set(cv2.CAP_PROP_FPS, float(fps))
 
         # confirm applied settings
@@ -43,6 +52,7 @@ class CameraStream:
         self.running = False
         self.thread = None
         self.frame = None
+        self.pendingSize = None
 
     def start(self):
         # start the camera thread if not already running
@@ -62,6 +72,12 @@ class CameraStream:
 
         # loop to continuously grab frames while running
         while self.running:
+            # apply resolution change requested by another thread between reads
+            with self.lock:
+                size, self.pendingSize = self.pendingSize, None
+            if size is not None:
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, int(size[0]))
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, int(size[1]))
             ok, fr = self.cap.read()
             # wait briefly if frame not ready
             if not ok:
@@ -71,6 +87,11 @@ class CameraStream:
             with self.lock:
                 self.frame = fr
 
+    def setResolution(self, width, height):
+        # request new capture size, applied by the camera thread before its next read
+        with self.lock:
+            self.pendingSize = (width, height)
+
     def read(self):
         # safely return a copy of the most recent frame
         with self.lock:
@@ -5,6 +5,17 @@ from draw_utils import drawOperatingZone, drawRobotGoal
 from coord_utils import worldToZone, robotWorldPose, smoothTuple, smoothAngle, asXy
 from obstacle import Obstacle
 
+clahe = None
+
+def getClahe():
+    '''
+    return shared CLAHE instance, created once on first use
+    '''
+    global clahe
+    if clahe is None:
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    return clahe
+
 def detectEdges(frame, low=30, high=100, blur=3):
     '''
     detect edges using Canny with CLAHE preprocessing
@@ -12,7 +23,7 @@ def detectEdges(frame, low=30, high=100, blur=3):
     # convert to grayscale
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     # apply contrast-limited adaptive histogram equalization
-    gray = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+    gray = getClahe().apply(gray)
     # apply median blur to reduce noise
     if blur > 0:
         gray = cv2.medianBlur(gray, blur | 1)
@@ -37,17 +48,12 @@ def getOperatingState(state):
         output['robot'] = {'x': robot[0], 'y': robot[1], 'theta': theta}
     return output
 
-def detectAndDrawObstacles(canvas, edges, pixelToWorld, zoneCornersMm, minArea=500, maxVertices=10):
+def findObstaclePolygons(edges, minArea=500, maxVertices=10):
     '''
-    detect obstacles from edges, draw on canvas, return Obstacle objects with vertices in mm
+    find candidate obstacle polygons in edge map, returns list of (contourIndex, approx) in pixels
     '''
-    if not zoneCornersMm:
-        return canvas, [], (0, 0)
     contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    # zone dimensions: corners = [tl, tr, br, bl]
-    bottomLen = np.linalg.norm(np.array(zoneCornersMm[2]) - np.array(zoneCornersMm[3]))  # BR to BL
-    leftLen = np.linalg.norm(np.array(zoneCornersMm[0]) - np.array(zoneCornersMm[3]))  # TL to BL
-    obstacles = []
+    polygons = []
     for i, contour in enumerate(contours):
         # filter by area and vertex count
         if cv2.contourArea(contour) < minArea or len(contour) > maxVertices:
@@ -56,47 +62,60 @@ def detectAndDrawObstacles(canvas, edges, pixelToWorld, zoneCornersMm, minArea=5
         approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
         if len(approx) > maxVertices:
             continue
-        obstacle = Obstacle(i)
-        pixelPts = []
-        # convert each vertex to mm coordinates
-        for pt in approx:
-            px, py = pt[0]
-            pixelPts.append([px, py])
-            # convert to zone coordinates then scale by zone dimensions
-            zonePt = worldToZone(pixelToWorld((px, py)), {'corners': zoneCornersMm})
-            if zonePt and -0.1 <= zonePt[0] <= 1.1 and -0.1 <= zonePt[1] <= 1.1:
-                obstacle.addVertex(zonePt[0] * bottomLen, zonePt[1] * leftLen)
-        # only keep obstacles with at least 3 vertices
-        if len(obstacle.getVertices()) >= 3:
-            obstacles.append(obstacle)
-            # draw obstacle on canvas
-            pts = np.array(pixelPts, dtype=np.int32).reshape((-1, 1, 2))
-            cv2.polylines(canvas, [pts], True, (255, 0, 255), 2, cv2.LINE_AA)
-            # add semi-transparent fill
-            overlay = canvas.copy()
-            cv2.fillPoly(overlay, [pts], (255, 0, 255))
-            cv2.addWeighted(overlay, 0.2, canvas, 0.8, 0, canvas)
-    return canvas, obstacles, (bottomLen, leftLen)
+        polygons.append((i, approx))
+    return polygons
 
-def createCanvasAndState(frame, robotId=8, goalId=9, edgeParams={'low': 25, 'high': 80, 'blur': 3}):
+def zoneDimensions(zoneCornersMm):
     '''
-    main vision pipeline, returns canvas with overlays and state dict with coordinates in mm
+    zone width and height in mm from corners [tl, tr, br, bl]
     '''
-    # detect edges for obstacle detection
-    edges = detectEdges(frame, **edgeParams)
-    # unique key for smoothing this robot/goal pair
-    smoothKey = f"r{robotId}_g{goalId}"
-    # create white canvas and draw edges in black
-    canvas = np.full_like(frame, 255)
-    canvas[edges > 0] = (0, 0, 0)
-    # detect ArUco markers
-    _, centers, cornersMap, _ = detectAruco(frame, draw=False)
-    # build operating zone from corner markers
-    zone = buildOperatingZone(centers)
-    # draw zone boundary on canvas
-    canvas = drawOperatingZone(canvas, zone)
-    frameH, frameW = frame.shape[:2]
-    # calibrate scale from robot's 50mm orientation line
+    bottomLen = np.linalg.norm(np.array(zoneCornersMm[2]) - np.array(zoneCornersMm[3]))  # BR to BL
+    leftLen = np.linalg.norm(np.array(zoneCornersMm[0]) - np.array(zoneCornersMm[3]))  # TL to BL
+    return (bottomLen, leftLen)
+
+def polygonToObstacle(obstacleId, pixelPts, pixelToWorld, zoneCornersMm, zoneDims):
+    '''
+    convert pixel polygon to Obstacle with vertices in mm, returns None if fewer than 3 vertices lie in the zone
+    '''
+    obstacle = Obstacle(obstacleId)
+    # convert each vertex to mm coordinates
+    for px, py in pixelPts:
+        # convert to zone coordinates then scale by zone dimensions
+        zonePt = worldToZone(pixelToWorld((px, py)), {'corners': zoneCornersMm})
+        if zonePt and -0.1 <= zonePt[0] <= 1.1 and -0.1 <= zonePt[1] <= 1.1:
+            obstacle.addVertex(zonePt[0] * zoneDims[0], zonePt[1] * zoneDims[1])
+    # only keep obstacles with at least 3 vertices
+    return obstacle if len(obstacle.getVertices()) >= 3 else None
+
+def detectAndDrawObstacles(canvas, edges, pixelToWorld, zoneCornersMm, minArea=500, maxVertices=10):
+    '''
+    detect obstacles from edges, draw on canvas, return Obstacle objects with vertices in mm
+    '''
+    if not zoneCornersMm:
+        return canvas, [], (0, 0)
+    # zone dimensions: corners = [tl, tr, br, bl]
+    zoneDims = zoneDimensions(zoneCornersMm)
+    obstacles = []
+    for i, approx in findObstaclePolygons(edges, minArea, maxVertices):
+        pixelPts = approx.reshape(-1, 2)
+        obstacle = polygonToObstacle(i, pixelPts, pixelToWorld, zoneCornersMm, zoneDims)
+        if obstacle is None:
+            continue
+        obstacles.append(obstacle)
+        # draw obstacle on canvas
+        pts = np.array(pixelPts, dtype=np.int32).reshape((-1, 1, 2))
+        cv2.polylines(canvas, [pts], True, (255, 0, 255), 2, cv2.LINE_AA)
+        # add semi-transparent fill
+        overlay = canvas.copy()
+        cv2.fillPoly(overlay, [pts], (255, 0, 255))
+        cv2.addWeighted(overlay, 0.2, canvas, 0.8, 0, canvas)
+    return canvas, obstacles, zoneDims
+
+def estimatePixelsPerMm(cornersMap, robotId, frameShape):
+    '''
+    calibrate scale from robot's 50mm marker, falls back to frame size when robot not visible
+    '''
+    frameH, frameW = frameShape[:2]
     pixelsPerMm = max(frameW, frameH) / 200.0  # fallback
     if cornersMap and robotId in cornersMap:
         arr = cornersMap[robotId].astype(float)
@@ -108,18 +127,12 @@ def createCanvasAndState(frame, robotId=8, goalId=9, edgeParams={'low': 25, 'hig
         lineLen = np.hypot(topMid[0] - cx, topMid[1] - cy)
         if lineLen > 0:
             pixelsPerMm = lineLen / 50.0  # 50mm = full marker height
-    # conversion function: pixel coords to world coords in mm with bottom-left origin
-    pixelToWorld = lambda pt: (pt[0] / pixelsPerMm, (frameH - 1 - pt[1]) / pixelsPerMm)
-    # convert zone corners to mm
-    zoneCornersMm = None
-    zoneDims = (0, 0)
-    if zone and zone.get('corners'):
-        zoneCornersMm = [pixelToWorld(c) for c in zone['corners']]
-    # detect obstacles and get zone dimensions
-    canvas, obstacles, zoneDims = detectAndDrawObstacles(canvas, edges, pixelToWorld, zoneCornersMm)
-    # draw robot and goal markers
-    canvas = drawRobotGoal(canvas, cornersMap if cornersMap else centers, robotId, goalId)
+    return pixelsPerMm
 
+def computeZonePoses(centers, cornersMap, pixelToWorld, zoneCornersMm, zoneDims, robotId=8, goalId=9):
+    '''
+    compute unsmoothed goal (x,y), robot (x,y) in mm and robot theta in degrees, all zone-local
+    '''
     # process goal position
     goalZone = None
     if goalId in centers and zoneCornersMm and zoneDims[0] > 0:
@@ -149,11 +162,68 @@ def createCanvasAndState(frame, robotId=8, goalId=9, edgeParams={'low': 25, 'hig
                                    zoneCornersMm[2][0] - zoneCornersMm[3][0])
             robotThetaZone = np.degrees(robotThetaWorld - edgeAngle)
             robotThetaZone = ((robotThetaZone + 180) % 360) - 180  # normalize to [-180, 180]
+    return goalZone, robotZone, robotThetaZone
+
+def createCanvasAndState(frame, robotId=8, goalId=9, edgeParams={'low': 25, 'high': 80, 'blur': 3},
+                         scale=1.0, scanObstacles=True, cache=None):
+    '''
+    main vision pipeline, returns canvas with overlays and state dict with coordinates in mm;
+    frame is downscaled by scale before detection, and with a cache dict obstacles are only re-detected when scanObstacles is set
+    or the frame size changed, state['obstaclesScanned'] tells whether they were
+    '''
+    # downscale frame for detection if requested
+    if scale < 1.0:
+        frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    # unique key for smoothing this robot/goal pair
+    smoothKey = f"r{robotId}_g{goalId}"
+    # detect ArUco markers
+    _, centers, cornersMap, _ = detectAruco(frame, draw=False)
+    # build operating zone from corner markers
+    zone = buildOperatingZone(centers)
+    frameH = frame.shape[0]
+    # calibrate scale from robot's 50mm orientation line
+    pixelsPerMm = estimatePixelsPerMm(cornersMap, robotId, frame.shape)
+    # conversion function: pixel coords to world coords in mm with bottom-left origin
+    pixelToWorld = lambda pt: (pt[0] / pixelsPerMm, (frameH - 1 - pt[1]) / pixelsPerMm)
+    # convert zone corners to mm
+    zoneCornersMm = None
+    zoneDims = (0, 0)
+    if zone and zone.get('corners'):
+        zoneCornersMm = [pixelToWorld(c) for c in zone['corners']]
+    # reuse cached edge/obstacle layer unless a rescan is due or the frame size changed
+    layer = cache.get('layer') if cache is not None else None
+    scanned = scanObstacles or layer is None or layer.shape != frame.shape
+    if not scanned:
+        canvas = layer.copy()
+        obstacles = cache['obstacles']
+        if zoneCornersMm:
+            zoneDims = zoneDimensions(zoneCornersMm)
+    else:
+        # detect edges for obstacle detection
+        edges = detectEdges(frame, **edgeParams)
+        # create white canvas and draw edges in black
+        canvas = np.full_like(frame, 255)
+        canvas[edges > 0] = (0, 0, 0)
+        # detect obstacles and get zone dimensions, min area is set for 1920x1080 and follows the processed size
+        areaScale = frame.shape[0] * frame.shape[1] / (1920.0 * 1080.0)
+        canvas, obstacles, zoneDims = detectAndDrawObstacles(canvas, edges, pixelToWorld, zoneCornersMm,
+                                                             minArea=500 * areaScale)
+        if cache is not None:
+            cache['layer'] = canvas.copy()
+            cache['obstacles'] = obstacles
+    # draw zone boundary on canvas
+    canvas = drawOperatingZone(canvas, zone)
+    # draw robot and goal markers
+    canvas = drawRobotGoal(canvas, cornersMap if cornersMap else centers, robotId, goalId)
+
+    # compute goal and robot pose in zone frame
+    goalZone, robotZone, robotThetaZone = computeZonePoses(centers, cornersMap, pixelToWorld, zoneCornersMm,
+                                                           zoneDims, robotId, goalId)
     # build state dictionary with smoothed coordinates
     state = {'zoneCorners': zoneCornersMm, 'goal': smoothTuple(smoothKey, 'goal', goalZone),
              'robot': smoothTuple(smoothKey, 'robot', robotZone),
              'robotTheta': smoothAngle(smoothKey, 'robotTheta', robotThetaZone),
-             'obstacles': obstacles}
+             'obstacles': obstacles, 'obstaclesScanned': scanned}
 
     # draw status text on canvas
     lines = []
@@ -0,0 +1,142 @@
+import time
+import math
+
+class FrameGovernor:
+    '''
+    adapts detection scale, capture resolution and obstacle scan rate so the vision loop stays within a latency budget
+    '''
+
+    def __init__(self, cam=None, latencyBudgetMs=33.0, cpuBudget=None, poseHz=30.0, idlePoseHz=10.0,
+                 obstacleHz=2.0, scales=(1.0, 0.75, 0.5), resolutions=((1920, 1080), (1280, 720)),
+                 idleSpeed=5.0, alpha=0.2, settleFrames=30):
+        # camera whose resolution may be changed, None keeps capture size fixed
+        self.cam = cam
+        # budget in ms per frame, a cpu budget (fraction of one core) caps it at the pose period
+        self.budgetMs = latencyBudgetMs
+        if cpuBudget is not None:
+            self.budgetMs = min(self.budgetMs, cpuBudget * 1000.0 / poseHz)
+        self.poseHz = poseHz
+        self.idlePoseHz = idlePoseHz
+        self.obstacleHz = obstacleHz
+        self.scales = list(scales)
+        self.resolutions = list(resolutions)
+        self.idleSpeed = idleSpeed  # mm/s below which the robot counts as stopped
+        self.alpha = alpha
+        self.settleFrames = settleFrames
+
+        # current quality levels, index 0 is best quality
+        self.scaleLevel = 0
+        self.resolutionLevel = 0
+        # processing time EMAs (ms) for pose-only and obstacle scan frames
+        self.poseMs = None
+        self.scanMs = None
+        # robot speed estimate (mm/s) from successive poses, None until two poses were seen
+        self.speed = None
+        self.lastRobot = None
+        self.lastRobotTime = None
+        # frame timing
+        self.lastScan = None
+        self.nextFrame = time.perf_counter()
+        self.frameStart = None
+        self.scanning = False
+        self.framesSinceChange = 0
+
+    def begin(self):
+        '''
+        start a frame, returns plan dict with detection scale and whether to rescan obstacles
+        '''
+        now = time.perf_counter()
+        self.frameStart = now
+        self.scanning = self.lastScan is None or now - self.lastScan >= 1.0 / self.obstacleHz
+        if self.scanning:
+            self.lastScan = now
+        return {'scale': self.scales[self.scaleLevel], 'scanObstacles': self.scanning}
+
+    def end(self, state=None):
+        '''
+        finish a frame, update timing and speed estimates and adjust quality levels
+        '''
+        now = time.perf_counter()
+        elapsed = (now - self.frameStart) * 1000.0
+        # the pipeline also rescans on its own when the frame size changed, trust what it reports
+        if state is not None and 'obstaclesScanned' in state:
+            if state['obstaclesScanned'] and not self.scanning:
+                self.lastScan = self.frameStart
+            self.scanning = state['obstaclesScanned']
+        # track scan and pose frames separately, scans cost far more
+        if self.scanning:
+            self.scanMs = elapsed if self.scanMs is None else self.alpha * elapsed + (1 - self.alpha) * self.scanMs
+        else:
+            self.poseMs = elapsed if self.poseMs is None else self.alpha * elapsed + (1 - self.alpha) * self.poseMs
+        self.updateSpeed(state, now)
+        self.adjust()
+        # schedule next frame at the current pose rate
+        self.nextFrame = max(self.frameStart + 1.0 / self.currentHz(), now)
+
+    def currentHz(self):
+        # full pose rate unless the robot is known to be stopped
+        if self.speed is None or self.speed >= self.idleSpeed:
+            return self.poseHz
+        return self.idlePoseHz
+
+    def updateSpeed(self, state, now):
+        # robot speed from zone-frame positions in mm
+        robot = state.get('robot') if state else None
+        if robot is None:
+            return
+        if self.lastRobot is not None and now > self.lastRobotTime:
+            dist = math.hypot(robot[0] - self.lastRobot[0], robot[1] - self.lastRobot[1])
+            speed = dist / (now - self.lastRobotTime)
+            # rise immediately when the robot starts moving, decay smoothly when it stops
+            if self.speed is None or speed > self.speed:
+                self.speed = speed
+            else:
+                self.speed = self.alpha * speed + (1 - self.alpha) * self.speed
+        self.lastRobot = (robot[0], robot[1])
+        self.lastRobotTime = now
+
+    def averageMs(self):
+        '''
+        expected processing time per frame with obstacle scans amortized over pose frames
+        '''
+        if self.poseMs is None:
+            return self.scanMs
+        if self.scanMs is None:
+            return self.poseMs
+        scanShare = min(1.0, self.obstacleHz / self.currentHz())
+        return self.poseMs + (self.scanMs - self.poseMs) * scanShare
+
+    def adjust(self):
+        # lower detection scale first, then capture resolution; raise in reverse order with hysteresis
+        self.framesSinceChange += 1
+        cost = self.averageMs()
+        if cost is None or self.framesSinceChange < self.settleFrames:
+            return
+        if cost > self.budgetMs:
+            if self.scaleLevel < len(self.scales) - 1:
+                self.setLevels(self.scaleLevel + 1, self.resolutionLevel)
+            elif self.resolutionLevel < len(self.resolutions) - 1:
+                self.setLevels(self.scaleLevel, self.resolutionLevel + 1)
+        elif cost < 0.6 * self.budgetMs:
+            if self.resolutionLevel > 0:
+                self.setLevels(self.scaleLevel, self.resolutionLevel - 1)
+            elif self.scaleLevel > 0:
+                self.setLevels(self.scaleLevel - 1, self.resolutionLevel)
+
+    def setLevels(self, scaleLevel, resolutionLevel):
+        # apply new quality levels and restart timing estimates
+        if resolutionLevel != self.resolutionLevel and self.cam is not None:
+            self.cam.setResolution(*self.resolutions[resolutionLevel])
+        self.scaleLevel = scaleLevel
+        self.resolutionLevel = resolutionLevel
+        self.poseMs = None
+        self.scanMs = None
+        self.framesSinceChange = 0
+        # force an obstacle scan at the new size
+        self.lastScan = None
+
+    def waitMs(self):
+        '''
+        ms left until the next frame is due, at least 1 for cv2.waitKey
+        '''
+        return max(1, int((self.nextFrame - time.perf_counter()) * 1000.0))
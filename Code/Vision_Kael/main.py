@@ -1,11 +1,21 @@
+import argparse
 import cv2
-from camera_setup import CameraStream
+from warm_start import WarmStart
+from governor import FrameGovernor
 from feed_processing import createCanvasAndState
+from state_log import StateLogger
 
 windowTitle = "Canvas view - q to quit"
 
-def main():
-    cam = CameraStream(index=0, width=1920, height=1080, fps=30).start()
+def main(logPath=None, connect=None):
+    # open camera in parallel with detector and buffer warm-up (and robot connection if given)
+    warm = WarmStart(index=0, width=1920, height=1080, fps=30, connect=connect)
+    cam = warm.wait()
+    # keep processing within budget: full obstacle scan at 2 Hz, robot pose at 30 Hz
+    governor = FrameGovernor(cam, latencyBudgetMs=33.0, poseHz=30.0, obstacleHz=2.0)
+    cache = {}
+    # optional binary state log for post-mission analysis
+    logger = StateLogger(logPath) if logPath else None
     try:
         while True:
             frame = cam.read()
@@ -13,13 +23,25 @@ def main():
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
                 continue
-            canvas, state = createCanvasAndState(frame)
-            cv2.imshow(windowTitle, cv2.resize(canvas, (0, 0), fx=0.5, fy=0.5))
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            plan = governor.begin()
+            canvas, state = createCanvasAndState(frame, scale=plan['scale'], scanObstacles=plan['scanObstacles'],
+                                                 cache=cache)
+            governor.end(state)
+            if logger is not None:
+                # pipeline reports whether it actually rescanned obstacles this frame
+                logger.log(state)
+            warm.markFirstState()
+            # display at half the capture size whatever the detection scale
+            cv2.imshow(windowTitle, cv2.resize(canvas, (frame.shape[1] // 2, frame.shape[0] // 2)))
+            if cv2.waitKey(governor.waitMs()) & 0xFF == ord('q'):
                 break
     finally:
         cam.stop()
+        if logger is not None:
+            logger.close()
         cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log", metavar="PATH", default=None, help="write binary state log to PATH.*")
+    main(logPath=parser.parse_args().log)
\ No newline at end of file
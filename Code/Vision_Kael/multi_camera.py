@@ -0,0 +1,279 @@
+import time
+import queue
+import multiprocessing as mp
+import cv2
+import numpy as np
+from camera_setup import CameraStream
+from aruco_utils import detectAruco, buildOperatingZone
+from feed_processing import (detectEdges, findObstaclePolygons, zoneDimensions, polygonToObstacle,
+                             estimatePixelsPerMm, computeZonePoses, getOperatingState)
+from coord_utils import smoothTuple, smoothAngle
+
+def sendLatest(outQueue, item):
+    '''
+    put item on a bounded queue, discarding the oldest queued item when full so the newest one always gets through
+    '''
+    try:
+        outQueue.put_nowait(item)
+    except queue.Full:
+        try:
+            outQueue.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            outQueue.put_nowait(item)
+        except queue.Full:
+            pass
+
+
+def cameraWorker(index, outQueue, stopEvent, width=1920, height=1080, fps=30, edgeParams=None):
+    '''
+    capture and detection loop for one camera, meant to run in its own process; sends pixel-space detections (no frames) to outQueue
+    '''
+    if edgeParams is None:
+        edgeParams = {'low': 25, 'high': 80, 'blur': 3}
+    cam = None
+    try:
+        cam = CameraStream(index=index, width=width, height=height, fps=fps).start()
+        while not stopEvent.is_set():
+            frame = cam.read()
+            if frame is None:
+                time.sleep(0.005)
+                continue
+            # detect markers (sub-pixel corners for registration) and obstacle polygons in this camera's pixel frame
+            _, centers, cornersMap, _ = detectAruco(frame, draw=False, roundCorners=False)
+            edges = detectEdges(frame, **edgeParams)
+            polygons = [approx.reshape(-1, 2) for _, approx in findObstaclePolygons(edges)]
+            detection = {'index': index, 'time': time.time(), 'shape': frame.shape[:2],
+                         'centers': centers, 'cornersMap': cornersMap, 'polygons': polygons}
+            sendLatest(outQueue, detection)
+    except Exception as e:
+        # report failure to the parent instead of dying silently
+        sendLatest(outQueue, {'index': index, 'time': time.time(), 'error': repr(e)})
+    finally:
+        if cam is not None:
+            cam.stop()
+
+
+def toReference(pts, homography):
+    '''
+    map pixel points (N,2) of one camera into the reference camera's pixel plane
+    '''
+    arr = np.asarray(pts, dtype=np.float32).reshape(-1, 1, 2)
+    return cv2.perspectiveTransform(arr, homography).reshape(-1, 2)
+
+
+def accumulateMarkers(markerMeans, detection, staticIds, maxFrames=100):
+    '''
+    running mean of static marker corners per camera, count capped at maxFrames so it still follows slow drift
+    '''
+    means = markerMeans.setdefault(detection['index'], {})
+    for cid in staticIds:
+        if cid not in detection['cornersMap']:
+            continue
+        pts = np.asarray(detection['cornersMap'][cid], dtype=float)
+        mean, n = means.get(cid, (pts, 0))
+        n = min(n + 1, maxFrames)
+        means[cid] = (mean + (pts - mean) / n, n)
+
+
+def registerCameras(markerMeans, refIndex, minShared=2, minFrames=10):
+    '''
+    homographies from each camera to the reference plane, from time-averaged corners of at least minShared static markers
+    seen by both cameras; chained breadth-first from the reference camera and rebuilt on every call so parent updates propagate
+    '''
+    homographies = {refIndex: np.eye(3)}
+    # only markers averaged over enough frames are trusted
+    stable = {i: {cid: mean for cid, (mean, n) in means.items() if n >= minFrames} for i, means in markerMeans.items()}
+    frontier = [refIndex]
+    while frontier:
+        j = frontier.pop(0)
+        for i, markers in stable.items():
+            if i in homographies:
+                continue
+            shared = [cid for cid in markers if cid in stable.get(j, {})]
+            # a single marker is too small a baseline to extrapolate across the arena
+            if len(shared) < minShared:
+                continue
+            src = np.concatenate([markers[cid] for cid in shared]).astype(np.float32)
+            dst = np.concatenate([stable[j][cid] for cid in shared]).astype(np.float32)
+            H, _ = cv2.findHomography(src, dst, 0)
+            if H is None:
+                continue
+            # chain through camera j to reach the reference plane
+            homographies[i] = homographies[j] @ H
+            frontier.append(i)
+    return homographies
+
+
+def mergeMarkers(detections, homographies):
+    '''
+    merge marker corners of all registered cameras into the reference plane, returns (centers, cornersMap)
+    '''
+    collected = {}
+    for i, det in detections.items():
+        if i not in homographies:
+            continue
+        for cid, pts in det['cornersMap'].items():
+            collected.setdefault(cid, []).append(toReference(pts, homographies[i]))
+    # average markers seen by several cameras
+    cornersMap = {cid: np.mean(views, axis=0) for cid, views in collected.items()}
+    centers = {cid: (float(pts[:, 0].mean()), float(pts[:, 1].mean())) for cid, pts in cornersMap.items()}
+    return centers, cornersMap
+
+
+class MultiCameraStream:
+    # class that captures from several cameras in parallel and stitches them into one zone
+    def __init__(self, indices, refIndex=None, width=1920, height=1080, fps=30, edgeParams=None,
+                 staticIds=(0, 1, 2, 3, 4, 5, 6, 7), maxAge=0.5, minShared=2, minFrames=10):
+        # store camera parameters
+        self.indices = list(indices)
+        self.refIndex = self.indices[0] if refIndex is None else refIndex
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.edgeParams = edgeParams
+        self.staticIds = list(staticIds)
+        self.maxAge = maxAge  # seconds after which a camera's detection is ignored
+        self.minShared = minShared
+        self.minFrames = minFrames
+
+        # one process and queue per camera, spawn behaves the same on every platform
+        self.ctx = mp.get_context("spawn")
+        self.stopEvent = self.ctx.Event()
+        self.queues = {i: self.ctx.Queue(maxsize=2) for i in self.indices}
+        self.processes = {}
+
+        # latest detection per camera, worker errors and registration to the reference camera
+        self.detections = {}
+        self.errors = {}
+        self.refShape = None
+        self.markerMeans = {}
+        self.homographies = {self.refIndex: np.eye(3)}
+
+    def start(self):
+        # start one capture process per camera if not already running
+        if self.processes:
+            return self
+        self.stopEvent.clear()
+        for i in self.indices:
+            p = self.ctx.Process(target=cameraWorker, daemon=True,
+                                 args=(i, self.queues[i], self.stopEvent, self.width, self.height, self.fps,
+                                       self.edgeParams))
+            p.start()
+            self.processes[i] = p
+        return self
+
+    def poll(self):
+        # drain queues keeping the most recent detection of each camera, every frame feeds registration
+        for i, q in self.queues.items():
+            while True:
+                try:
+                    det = q.get_nowait()
+                except queue.Empty:
+                    break
+                if 'error' in det:
+                    self.errors[i] = det['error']
+                    print(f"Camera {i} worker failed: {det['error']}")
+                    continue
+                self.detections[i] = det
+                accumulateMarkers(self.markerMeans, det, self.staticIds)
+                if i == self.refIndex:
+                    self.refShape = det['shape']
+        # workers that exited without reporting
+        for i, p in self.processes.items():
+            if not p.is_alive() and i not in self.errors:
+                self.errors[i] = f"worker exited with code {p.exitcode}"
+                print(f"Camera {i} worker failed: {self.errors[i]}")
+        # forget detections from stalled or dead cameras so their last poses are not merged
+        now = time.time()
+        for i in [i for i, det in self.detections.items() if i in self.errors or now - det['time'] > self.maxAge]:
+            del self.detections[i]
+        # rebuild registration from averaged marker corners
+        self.homographies = registerCameras(self.markerMeans, self.refIndex, self.minShared, self.minFrames)
+        return self.detections
+
+    def getState(self, robotId=8, goalId=9):
+        '''
+        merged state dict with coordinates in mm, same layout as createCanvasAndState
+        '''
+        self.poll()
+        state = {'zoneCorners': None, 'goal': None, 'robot': None, 'robotTheta': None, 'obstacles': []}
+        if self.refShape is None or not self.detections:
+            return state
+        centers, cornersMap = mergeMarkers(self.detections, self.homographies)
+        zone = buildOperatingZone(centers)
+        # reference camera defines the pixel-to-mm conversion for the whole mosaic
+        refShape = self.refShape
+        frameH = refShape[0]
+        pixelsPerMm = estimatePixelsPerMm(cornersMap, robotId, refShape)
+        pixelToWorld = lambda pt: (pt[0] / pixelsPerMm, (frameH - 1 - pt[1]) / pixelsPerMm)
+        zoneCornersMm = None
+        zoneDims = (0, 0)
+        obstacles = []
+        if zone and zone.get('corners'):
+            zoneCornersMm = [pixelToWorld(c) for c in zone['corners']]
+            zoneDims = zoneDimensions(zoneCornersMm)
+            obstacles = self.mergeObstacles(pixelToWorld, zoneCornersMm, zoneDims)
+        goalZone, robotZone, robotThetaZone = computeZonePoses(centers, cornersMap, pixelToWorld, zoneCornersMm,
+                                                               zoneDims, robotId, goalId)
+        # smooth under own key so single and multi camera pipelines can run side by side
+        smoothKey = f"multi_r{robotId}_g{goalId}"
+        state.update({'zoneCorners': zoneCornersMm, 'goal': smoothTuple(smoothKey, 'goal', goalZone),
+                      'robot': smoothTuple(smoothKey, 'robot', robotZone),
+                      'robotTheta': smoothAngle(smoothKey, 'robotTheta', robotThetaZone),
+                      'obstacles': obstacles})
+        return state
+
+    def getOperatingState(self, robotId=8, goalId=9):
+        # merged operating state for the path planning module
+        return getOperatingState(self.getState(robotId, goalId))
+
+    def mergeObstacles(self, pixelToWorld, zoneCornersMm, zoneDims):
+        '''
+        convert obstacle polygons of all registered cameras to mm, skipping duplicates from overlapping views
+        '''
+        obstacles = []
+        for i, det in self.detections.items():
+            if i not in self.homographies:
+                continue
+            for poly in det['polygons']:
+                obstacle = polygonToObstacle(len(obstacles), toReference(poly, self.homographies[i]),
+                                             pixelToWorld, zoneCornersMm, zoneDims)
+                if obstacle is None:
+                    continue
+                # same obstacle seen by another camera if its centroid falls inside a kept one
+                verts = np.array(obstacle.getVertices(), dtype=np.float32)
+                cx, cy = float(verts[:, 0].mean()), float(verts[:, 1].mean())
+                if any(cv2.pointPolygonTest(np.array(o.getVertices(), dtype=np.float32), (cx, cy), False) >= 0
+                       for o in obstacles):
+                    continue
+                obstacles.append(obstacle)
+        return obstacles
+
+    def stop(self):
+        # stop capture processes and release resources
+        self.stopEvent.set()
+        for p in self.processes.values():
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        self.processes = {}
+
+
+def main(indices=(0, 1)):
+    cams = MultiCameraStream(indices).start()
+    try:
+        while True:
+            state = cams.getOperatingState()
+            registered = sorted(i for i in cams.homographies if i in cams.detections)
+            print(f"cams {registered} robot={state['robot']} goal={state['goal']} "
+                  f"obstacles={len(state['obstacles'])}")
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cams.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import os
+import time
+import numpy as np
+
+# one record per frame, missing values are NaN; obstacles are rows [obstacleStart, obstacleStart + obstacleCount)
+frameDtype = np.dtype([('time', 'f8'), ('robot', 'f4', (3,)), ('goal', 'f4', (2,)), ('zoneCorners', 'f4', (4, 2)),
+                       ('obstacleStart', 'i8'), ('obstacleCount', 'i4')])
+# one record per obstacle written on scan frames ('frame' is the scanning frame), vertices are rows [vertexStart, vertexStart + vertexCount) of the vertex buffer
+obstacleDtype = np.dtype([('frame', 'i8'), ('id', 'i4'), ('vertexStart', 'i8'), ('vertexCount', 'i4')])
+# vertex side buffer, (x, y) in mm
+vertexDtype = np.dtype([('x', 'f4'), ('y', 'f4')])
+
+def logPaths(path):
+    '''
+    file paths for frame records, obstacle records and vertex buffer of a log
+    '''
+    return {'frames': path + ".frames", 'obstacles': path + ".obstacles", 'vertices': path + ".vertices"}
+
+def recordCount(filePath, dtype):
+    # number of complete records already in file
+    return os.path.getsize(filePath) // dtype.itemsize if os.path.exists(filePath) else 0
+
+
+class StateLogger:
+    '''
+    append-only binary log of operating states as fixed-layout records, resumes existing logs at the same path
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        paths = logPaths(path)
+        # resume counters so indices stay valid when appending to an existing log
+        self.nFrames = recordCount(paths['frames'], frameDtype)
+        self.nObstacles = recordCount(paths['obstacles'], obstacleDtype)
+        self.nVertices = recordCount(paths['vertices'], vertexDtype)
+        self.files = {name: open(p, "ab") for name, p in paths.items()}
+        # obstacle rows of the last scan, referenced by frames that reuse it
+        self.lastObstacleStart = self.nObstacles
+        self.lastObstacleCount = 0
+        # reused single frame record
+        self.record = np.zeros(1, dtype=frameDtype)
+
+    def log(self, state, t=None, scanObstacles=None):
+        '''
+        append one frame, accepts state from createCanvasAndState or getOperatingState;
+        without scanObstacles the frame points at the obstacles of the last scan instead of writing them again,
+        by default taken from state['obstaclesScanned'] when the pipeline reports it
+        '''
+        if scanObstacles is None:
+            scanObstacles = state.get('obstaclesScanned', True)
+        rec = self.record[0]
+        rec['time'] = time.time() if t is None else t
+        # robot pose (x, y, theta), either tuple + robotTheta or dict
+        robot = state.get('robot')
+        theta = state.get('robotTheta')
+        if isinstance(robot, dict):
+            robot, theta = (robot['x'], robot['y']), robot['theta']
+        rec['robot'] = (np.nan, np.nan, np.nan) if robot is None else (robot[0], robot[1],
+                                                                       np.nan if theta is None else theta)
+        goal = state.get('goal')
+        if isinstance(goal, dict):
+            goal = (goal['x'], goal['y'])
+        rec['goal'] = (np.nan, np.nan) if goal is None else (goal[0], goal[1])
+        corners = state.get('zoneCorners')
+        rec['zoneCorners'] = np.nan if not corners else corners
+
+        # frames between scans reuse the last scan's obstacle rows
+        if not scanObstacles:
+            rec['obstacleStart'] = self.lastObstacleStart
+            rec['obstacleCount'] = self.lastObstacleCount
+            self.files['frames'].write(self.record.tobytes())
+            self.nFrames += 1
+            return
+
+        # obstacle records and vertices in one write each
+        obstacles = state.get('obstacles') or []
+        vertexArrays = [np.asarray(o.getVertices() if hasattr(o, 'getVertices') else o['vertices'],
+                                   dtype=np.float32).reshape(-1, 2) for o in obstacles]
+        counts = np.array([len(v) for v in vertexArrays], dtype=np.int64)
+        obsRecs = np.zeros(len(obstacles), dtype=obstacleDtype)
+        obsRecs['frame'] = self.nFrames
+        obsRecs['id'] = [o.id if hasattr(o, 'id') else o['id'] for o in obstacles]
+        obsRecs['vertexStart'] = self.nVertices + np.cumsum(counts) - counts
+        obsRecs['vertexCount'] = counts
+        rec['obstacleStart'] = self.nObstacles
+        rec['obstacleCount'] = len(obstacles)
+        if vertexArrays:
+            self.files['vertices'].write(np.concatenate(vertexArrays).tobytes())
+            self.files['obstacles'].write(obsRecs.tobytes())
+        self.files['frames'].write(self.record.tobytes())
+
+        self.lastObstacleStart = self.nObstacles
+        self.lastObstacleCount = len(obstacles)
+        self.nFrames += 1
+        self.nObstacles += len(obstacles)
+        self.nVertices += int(counts.sum())
+
+    def flush(self):
+        # push buffered records to disk
+        for f in self.files.values():
+            f.flush()
+
+    def close(self):
+        # close log files
+        for f in self.files.values():
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+
+def loadStateLog(path, mode="r"):
+    '''
+    memory-map a whole log, returns dict of structured arrays 'frames', 'obstacles' and 'vertices'
+    '''
+    dtypes = {'frames': frameDtype, 'obstacles': obstacleDtype, 'vertices': vertexDtype}
+    log = {}
+    for name, p in logPaths(path).items():
+        n = recordCount(p, dtypes[name])
+        # np.memmap cannot map empty files
+        log[name] = np.memmap(p, dtype=dtypes[name], mode=mode, shape=(n,)) if n else np.zeros(0, dtype=dtypes[name])
+    return log
+
+def obstacleVertices(log, obstacleIndex):
+    '''
+    vertices of one obstacle record as (N, 2) array in mm
+    '''
+    ob = log['obstacles'][obstacleIndex]
+    verts = log['vertices'][ob['vertexStart']:ob['vertexStart'] + ob['vertexCount']]
+    return np.column_stack((verts['x'], verts['y']))
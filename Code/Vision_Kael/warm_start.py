@@ -0,0 +1,99 @@
+import time
+import threading
+import numpy as np
+from camera_setup import CameraStream
+from aruco_utils import getDetector
+from feed_processing import createCanvasAndState, getClahe
+
+class WarmStart:
+    # opens the camera and warms up the vision pipeline in the background while the caller connects the robot
+    def __init__(self, index=0, width=1920, height=1080, fps=30, connect=None):
+        # store start time, all timings are reported in ms from here
+        self.t0 = time.perf_counter()
+        self.timings = {}
+        self.cam = None
+        self.error = None
+        self.warmError = None
+        self.link = None
+
+        # open camera in parallel, VideoCapture releases the GIL while the driver starts
+        self.thread = threading.Thread(target=self.openCamera, args=(index, width, height, fps), daemon=True)
+        self.thread.start()
+        # build detector and buffers in parallel too, OpenCV releases the GIL while it works
+        self.warmThread = threading.Thread(target=self.warmPipeline, args=(width, height), daemon=True)
+        self.warmThread.start()
+
+        # connect robot on this thread so the connection stays usable by the caller
+        if connect is not None:
+            try:
+                self.link = connect()
+            except Exception:
+                # release the camera the background thread may already have opened
+                self.join()
+                if self.cam is not None:
+                    self.cam.stop()
+                raise
+            self.timings['robotConnect'] = self.elapsed()
+
+    def elapsed(self):
+        # ms since warm start began
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    def openCamera(self, index, width, height, fps):
+        # open and start camera stream, errors are raised later by wait()
+        try:
+            self.cam = CameraStream(index=index, width=width, height=height, fps=fps).start()
+        except Exception as e:
+            self.error = e
+        self.timings['cameraOpen'] = self.elapsed()
+
+    def warmPipeline(self, width, height):
+        '''
+        pay first-call costs (detector, CLAHE, full-size array allocation) on a blank frame
+        '''
+        try:
+            getDetector()
+            getClahe()
+            # blank frame has no markers, so smoothing state is left untouched
+            createCanvasAndState(np.full((height or 1080, width or 1920, 3), 255, dtype=np.uint8))
+        except Exception as e:
+            self.warmError = e
+        self.timings['pipelineWarm'] = self.elapsed()
+
+    def join(self, timeout=None):
+        # wait for camera opening and pipeline warm-up threads
+        self.thread.join(timeout)
+        self.warmThread.join(timeout)
+
+    def releaseLink(self):
+        # close the robot connection returned by connect, context managers are exited
+        if self.link is None:
+            return
+        if hasattr(self.link, '__exit__'):
+            self.link.__exit__(None, None, None)
+        elif hasattr(self.link, 'close'):
+            self.link.close()
+        self.link = None
+
+    def wait(self, timeout=None):
+        '''
+        wait for camera and warm-up, returns the started CameraStream; on failure releases camera and robot link and raises
+        '''
+        self.join(timeout)
+        error = self.error or self.warmError
+        if error is not None:
+            if self.cam is not None:
+                self.cam.stop()
+            self.releaseLink()
+            raise error
+        return self.cam
+
+    def markFirstState(self):
+        '''
+        record and report time-to-first-state, only the first call counts
+        '''
+        if 'firstState' in self.timings:
+            return
+        self.timings['firstState'] = self.elapsed()
+        details = ", ".join(f"{k} {v:.0f} ms" for k, v in self.timings.items() if k != 'firstState')
+        print(f"Time to first state: {self.timings['firstState']:.0f} ms ({details})")
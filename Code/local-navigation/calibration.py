@@ -13,6 +13,8 @@ THYMIO_482_CALIBRATION = Calibration(3.1254, 95.000)
 def forward_test(calibration: Calibration) -> None:
     
     with Thymio(calibration) as thymio:
+        # Pay connection and first compilation cost before moving
+        thymio.prepare()
         for _ in range(10):
             thymio.forward(100)
             thymio.backward(100)
@@ -20,6 +22,8 @@ def forward_test(calibration: Calibration) -> None:
 def turn_test(calibration: Calibration) -> None:
 
     with Thymio(calibration) as thymio:
+        # Pay connection and first compilation cost before moving
+        thymio.prepare()
         for _ in range(4):
             thymio.turn(np.pi)
             thymio.turn(np.pi)
@@ -16,6 +16,9 @@ def navigate(path: np.ndarray, calibration: Calibration) -> None:
     # Connect to thymio
     with Thymio(calibration) as thymio:
 
+        # Pay connection and first compilation cost before moving
+        thymio.prepare()
+
         # For each waypoint
         currentDirection = 0
         for i in range(path.shape[0] - 1):
@@ -6,6 +6,7 @@
 from tdmclient import ClientAsync
 from tdmclient.clientasyncnode import ClientAsyncNode
 import numpy as np
+import time
 
 # Calibration class
 class Calibration():
@@ -36,11 +37,16 @@ class Thymio():
 
     DONE_POLLING_PERIOD = 0.1 # Seconds
 
+    # Program templates, read from disk once per process
+    programCache = {}
+
     def __init__(self, calibration: Calibration) -> None:
         self.calibration = calibration
         self.done = False
         self.programPath = None
         self.programSource = None
+        self.startTime = time.perf_counter()
+        self.firstMoveTime = None
         self.client = ClientAsync()
 
     def __enter__(self) -> 'Thymio':
@@ -78,19 +84,61 @@ class Thymio():
             error = await node.run()
             if error is not None:
                 raise RuntimeError(f'Error {error['error_code']}')
+
+            # Report time to first move once
+            if self.firstMoveTime is None:
+                self.firstMoveTime = time.perf_counter() - self.startTime
+                print(f'Time to first move: {self.firstMoveTime * 1000:.0f} ms')
             
             # Wait until program is done
             while not self.done:
                 await self.client.sleep(Thymio.DONE_POLLING_PERIOD)
 
+    async def warmup(self):
+
+        node: ClientAsyncNode
+        with await self.client.lock() as node:
+
+            # Register events
+            error = await node.register_events([
+                ('done', 0)
+            ])
+            if error is not None:
+                raise RuntimeError(f'Event registration error: {error}')
+
+            # Compile program without running it
+            error = await node.compile(self.programSource)
+            if error is not None:
+                raise RuntimeError(f'Compilation error: {self.programPath} at line {error['error_line']}:{error['error_col']} {error['error_msg']}')
+
+    def load_program(self, path: str, **kwargs) -> None:
+
+        # Load program template, cached after first read
+        if path not in Thymio.programCache:
+            with open(path) as file:
+                Thymio.programCache[path] = file.read()
+        self.programPath = path
+        self.programSource = Thymio.programCache[path].format(**kwargs)
+
+    def prepare(self, path: str = 'move.aesl') -> None:
+        """
+        Wait for the node and compile a motionless program so that
+        connection and first compilation costs are paid before moving
+        """
+        self.load_program(
+            path,
+            SCALE           = int(self.calibration.scale * 10000),
+            TARGET          = 0,
+            LEFT_DIRECTION  = '',
+            RIGHT_DIRECTION = ''
+        )
+        self.client.run_async_program(self.warmup)
+        print(f'Robot ready in {(time.perf_counter() - self.startTime) * 1000:.0f} ms')
+
     def run_program(self, path: str, **kwargs) -> None:
 
         # Load program
-        self.programPath = path
-        with open(path) as file:
-            source = file.read()
-            self.programPath = path
-            self.programSource = source.format(**kwargs)
+        self.load_program(path, **kwargs)
         
         # Run program
         self.client.run_async_program(self.execute)